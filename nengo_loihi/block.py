@@ -91,13 +91,18 @@ class LoihiBlock:
 
 
 class Config:
+    # Subclasses may define ``__slots__`` (typically equal to ``params``)
+    # to avoid a per-instance ``__dict__``.
+    __slots__ = ()
+
+    def _values(self):
+        return tuple(getattr(self, key) for key in self.params)
+
     def __eq__(self, obj):
-        return isinstance(obj, type(self)) and all(
-            self.__dict__[key] == obj.__dict__[key] for key in self.params
-        )
+        return isinstance(obj, type(self)) and self._values() == obj._values()
 
     def __hash__(self):
-        return hash(tuple(self.__dict__[key] for key in self.params))
+        return hash(self._values())
 
 
 class Compartment:
@@ -1,4 +1,7 @@
+import collections
+import heapq
 import logging
+import weakref
 
 import numpy as np
 from nengo.exceptions import ValidationError
@@ -25,16 +28,25 @@ logger = logging.getLogger(__name__)
 
 
 def compute_cfgs(core, list_cfgs):
-    cfg_lists = []
-    for block in core.blocks:
-        cfg_lists.append(list_cfgs(block))
+    """Combine the unique cfgs of all blocks on a core.
 
-    cfgs = list(set(p for plist in cfg_lists for p in plist))
+    ``list_cfgs(block)`` must return a list of the unique cfgs in the block,
+    along with an array giving the index into that list for each compartment.
+    """
+    cfgs = []
+    cfg_to_idx = {}
     cfg_idxs = {}
-    for block, plist in zip(core.blocks, cfg_lists):
-        cfg_idxs[block] = np.zeros(len(plist), dtype=np.int32)
-        for k, cfg in enumerate(cfgs):
-            cfg_idxs[block][[p == cfg for p in plist]] = k
+    for block in core.blocks:
+        block_cfgs, block_idxs = list_cfgs(block)
+        core_idxs = np.empty(len(block_cfgs), dtype=np.int32)
+        for k, cfg in enumerate(block_cfgs):
+            idx = cfg_to_idx.get(cfg)
+            if idx is None:
+                idx = len(cfgs)
+                cfg_to_idx[cfg] = idx
+                cfgs.append(cfg)
+            core_idxs[k] = idx
+        cfg_idxs[block] = core_idxs[block_idxs]
 
     return cfgs, cfg_idxs
 
@@ -43,18 +55,24 @@ def core_compartment_cfgs(core):
     """Compute all compartment_cfgs needed for a core"""
 
     def list_compartment_cfgs(block):
-        cfgs = []
-        for i in range(block.compartment.n_compartments):
-            cfgs.append(
-                CompartmentConfig(
-                    decay_u=block.compartment.decay_u[i],
-                    decay_v=block.compartment.decay_v[i],
-                    refract_delay=block.compartment.refract_delay[i],
-                    enable_noise=block.compartment.enable_noise[i],
-                )
-            )
-
-        return cfgs
+        compartment = block.compartment
+        n = compartment.n_compartments
+        params = CompartmentConfig.params
+        arrays = {key: getattr(compartment, key) for key in params}
+        if n > 0 and all(np.all(a == a[0]) for a in arrays.values()):
+            # fast path for the common case where all compartments are the same
+            cfg = CompartmentConfig(**{key: a[0] for key, a in arrays.items()})
+            return [cfg], np.zeros(n, dtype=np.int32)
+
+        values = np.empty(n, dtype=[(key, a.dtype) for key, a in arrays.items()])
+        for key, a in arrays.items():
+            values[key] = a
+
+        unique, idxs = np.unique(values, return_inverse=True)
+        cfgs = [
+            CompartmentConfig(**{key: row[key] for key in params}) for row in unique
+        ]
+        return cfgs, idxs.ravel()
 
     return compute_cfgs(core, list_compartment_cfgs)
 
@@ -63,18 +81,20 @@ def core_vth_cfgs(core):
     """Compute all vth_cfgs needed for a core"""
 
     def list_vth_cfgs(block):
-        cfgs = []
         vth, _ = vth_to_manexp(block.compartment.vth)
-        for i in range(block.compartment.n_compartments):
-            cfgs.append(VthConfig(vth=vth[i]))
+        if vth.size > 0 and np.all(vth == vth[0]):
+            # fast path for the common case where all compartments are the same
+            return [VthConfig(vth=int(vth[0]))], np.zeros(vth.size, dtype=np.int32)
 
-        return cfgs
+        unique, idxs = np.unique(vth, return_inverse=True)
+        return [VthConfig(vth=int(v)) for v in unique], idxs.ravel()
 
     return compute_cfgs(core, list_vth_cfgs)
 
 
 def core_stdp_pre_cfgs(core):
     cfgs = []
+    cfg_to_idx = {}
     cfg_idxs = {}
     for synapse in core.synapses:
         if synapse.learning:
@@ -83,11 +103,12 @@ def core_stdp_pre_cfgs(core):
                 tau=synapse.tracing_tau, spike_int=mag_int, spike_frac=mag_frac
             )
 
-            if tracecfg in cfgs:
-                cfg_idxs[synapse] = cfgs.index(tracecfg)
-            else:
-                cfg_idxs[synapse] = len(cfgs)
+            idx = cfg_to_idx.get(tracecfg)
+            if idx is None:
+                idx = len(cfgs)
+                cfg_to_idx[tracecfg] = idx
                 cfgs.append(tracecfg)
+            cfg_idxs[synapse] = idx
         else:
             cfg_idxs[synapse] = None
 
@@ -114,18 +135,21 @@ class Allocator:
         core.add_block(block)
 
         compartment_cfgs, compartment_cfg_idxs = core_compartment_cfgs(core)
-        [core.add_compartment_cfg(cfg) for cfg in compartment_cfgs]
+        for cfg in compartment_cfgs:
+            core.add_compartment_cfg(cfg)
         core.compartment_cfg_idxs = compartment_cfg_idxs
 
         vth_cfgs, vth_cfg_idxs = core_vth_cfgs(core)
-        [core.add_vth_cfg(cfg) for cfg in vth_cfgs]
+        for cfg in vth_cfgs:
+            core.add_vth_cfg(cfg)
         core.vth_cfg_idxs = vth_cfg_idxs
 
         for synapse in block.synapses:
             core.add_synapse(synapse)
 
         stdp_pre_cfgs, stdp_pre_cfg_idxs = core_stdp_pre_cfgs(core)
-        [core.add_stdp_pre_cfg(stdp_pre_cfg) for stdp_pre_cfg in stdp_pre_cfgs]
+        for stdp_pre_cfg in stdp_pre_cfgs:
+            core.add_stdp_pre_cfg(stdp_pre_cfg)
         core.stdp_pre_cfg_idxs = stdp_pre_cfg_idxs
 
         core.stdp_pre_cfg_idx = None  # hardware.builder will set
@@ -260,7 +284,29 @@ def ensemble_to_block_rates(model, ensemble_rates):
     return block_rates
 
 
-def estimate_interblock_activity(block_map, block_rates=None):
+_axon_valid_masks = weakref.WeakKeyDictionary()
+
+
+def _axon_valid_mask(axon, n_compartments):
+    """Boolean mask of the compartments that map to a valid axon in ``axon``.
+
+    Masks are cached per axon, and recomputed if its compartment map is replaced.
+    """
+    cached = _axon_valid_masks.get(axon)
+    if (
+        cached is not None
+        and cached[0] is axon.compartment_map
+        and cached[1].size == n_compartments
+    ):
+        return cached[1]
+
+    valid = axon.map_axon(np.arange(n_compartments)) >= 0
+    valid.setflags(write=False)
+    _axon_valid_masks[axon] = (axon.compartment_map, valid)
+    return valid
+
+
+def estimate_interblock_activity(block_map, block_rates=None, synapse_block_map=None):
     """Estimate the amount of activity projected from one block to another.
 
     If ``block_rates`` is not provided, we assume all axons are active.
@@ -271,6 +317,9 @@ def estimate_interblock_activity(block_map, block_rates=None):
         Mapping from a unique int (block ID) to a block.
     block_rates : dict, optional
         Mapping from a `LoihiBlock` to target firing rates for the block's neurons.
+    synapse_block_map : dict, optional
+        Mapping from ``id(synapse)`` to the ID of the block containing it
+        (e.g. from `.Board.index_blocks`). Computed from ``block_map`` if not given.
 
     Returns
     -------
@@ -279,37 +328,37 @@ def estimate_interblock_activity(block_map, block_rates=None):
         the relative activity between the two blocks.
     """
 
-    activity = {k: {} for k in block_map}
+    if synapse_block_map is None:
+        synapse_block_map = {}
+        for i, block_i in block_map.items():
+            for synapse in block_i.synapses:
+                assert id(synapse) not in synapse_block_map
+                synapse_block_map[id(synapse)] = i
 
-    synapse_block_map = {}
+    activity = {}
     for i, block_i in block_map.items():
-        for synapse in block_i.synapses:
-            assert id(synapse) not in synapse_block_map
-            synapse_block_map[id(synapse)] = i
+        rates = block_rates.get(block_i) if block_rates is not None else None
+
+        # Use a non-zero value as default, so that even if all rates are zero,
+        # this still gets recognized as a connection from i to j
+        activity_i = collections.defaultdict(lambda: 1e-16)
 
-    for i, block_i in block_map.items():
         for axon in block_i.axons:
             j = synapse_block_map[id(axon.target)]
 
             if i == j:
                 continue  # ignore self connections
 
-            # Use a non-zero value as default, so that even if all rates are zero,
-            # this still gets recognized as a connection from i to j
-            activity[i].setdefault(j, 1e-16)
-
             if block_rates is None:
-                val = axon.n_axons
-            elif block_i not in block_rates:
+                activity_i[j] += axon.n_axons
+            elif rates is None:
                 raise KeyError(f"block {block_i} not in block_rates")
             else:
-                rates = block_rates[block_i]
-                comp_idxs = np.arange(block_i.compartment.n_compartments)
-                axon_ids = axon.map_axon(comp_idxs)
-                assert axon_ids.size == rates.size
-                val = np.sum(rates[axon_ids >= 0])
+                valid = _axon_valid_mask(axon, block_i.compartment.n_compartments)
+                assert valid.size == rates.size
+                activity_i[j] += np.sum(rates[valid])
 
-            activity[i][j] += val
+        activity[i] = dict(activity_i)
 
     return activity
 
@@ -332,30 +381,28 @@ def estimate_interchip_activity(board, block_rates=None):
         For each block ID, a mapping from block IDs to an estimate of
         the relative activity between the two blocks.
     """
-    block_map = {}
-    block_chip = {}
-    for chip in board.chips:
-        chip_idx = board.chip_idxs[chip]
-        for core in chip.cores:
-            for block in core.blocks:
-                block_map[len(block_map)] = block
-                block_chip[len(block_chip)] = chip_idx
-
-    interblock_activity = estimate_interblock_activity(block_map, block_rates)
-
-    stats = {"interchip": 0, "intrachip": 0}
-    stats["interchip_pairs"] = []
-    stats["intrachip_pairs"] = []
-    for i, block in block_map.items():
-        chip_idx_i = block_chip[i]
-        for j, activity in interblock_activity[i].items():
-            assert (
-                i != j
-            ), "estimate_interblock_activity should skip recurrent connections"
-            chip_idx_j = block_chip[j]
-            key = "intrachip" if chip_idx_i == chip_idx_j else "interchip"
-            stats[key] += activity
-            stats[f"{key}_pairs"].append((block_map[i], block_map[j]))
+    block_map, block_chip, synapse_block_map = board.index_blocks()
+    interblock_activity = estimate_interblock_activity(
+        block_map, block_rates=block_rates, synapse_block_map=synapse_block_map
+    )
+
+    pairs = [(i, j) for i in block_map for j in interblock_activity[i]]
+    pre, post = np.array(pairs, dtype=int).reshape(-1, 2).T
+    activity = np.array(
+        [a for i in block_map for a in interblock_activity[i].values()], dtype=float
+    )
+    assert np.all(
+        pre != post
+    ), "estimate_interblock_activity should skip recurrent connections"
+
+    intrachip = block_chip[pre] == block_chip[post]
+    stats = {}
+    for key, mask in (("interchip", ~intrachip), ("intrachip", intrachip)):
+        stats[key] = float(np.sum(activity[mask]))
+        stats[f"{key}_pairs"] = [
+            (block_map[i], block_map[j])
+            for i, j in zip(pre[mask].tolist(), post[mask].tolist())
+        ]
 
     return stats
 
@@ -390,16 +437,18 @@ class GreedyInterchip(Greedy):
         block_conns_out = estimate_interblock_activity(
             block_map, block_rates=block_rates
         )
-        block_conns_in = {
-            i: {j: block_conns_out[j][i] for j in block_map if i in block_conns_out[j]}
-            for i in block_map
-        }
 
-        # find blocks with no pre block
-        no_pre_blocks = []
+        # strongest connection (in either direction) between each pair of blocks
+        block_conns = {i: {} for i in block_map}
         for i in block_map:
-            if sum(v for v in block_conns_in[i].values()) == 0:
-                no_pre_blocks.append(i)
+            for j, ij in block_conns_out[i].items():
+                block_conns[i][j] = max(block_conns[i].get(j, 0), ij)
+                block_conns[j][i] = max(block_conns[j].get(i, 0), ij)
+
+        # find blocks with no pre block (connection activities are always non-zero,
+        # so any incoming connection counts). Blocks are removed once allocated.
+        has_pre = set(j for i in block_map for j in block_conns_out[i])
+        no_pre_blocks = dict.fromkeys(i for i in block_map if i not in has_pre)
 
         # --- create board
         board = Board()
@@ -410,7 +459,8 @@ class GreedyInterchip(Greedy):
 
         # --- add blocks to chips
         chip = None
-        unallocated_blocks = set(block_map)
+        # use an (ordered) dict rather than a set, so that picks are deterministic
+        unallocated_blocks = dict.fromkeys(block_map)
 
         while len(unallocated_blocks) > 0:
             if chip is None or len(chip.cores) == self.cores_per_chip:
@@ -421,45 +471,41 @@ class GreedyInterchip(Greedy):
                 # start a new chip
                 chip = board.new_chip()
 
+                # `chip_conns` maps each unallocated block to its largest connection
+                # to blocks on this chip. `chip_heap` orders the same values for fast
+                # retrieval of the maximum; stale entries are skipped when popped.
+                chip_conns = {}
+                chip_heap = []
+
                 # choose a no-pre block, if possible
-                for block_idx in no_pre_blocks:
-                    if block_idx in unallocated_blocks:
-                        break
-                else:
+                block_idx = next(iter(no_pre_blocks), None)
+                if block_idx is None:
                     block_idx = next(iter(unallocated_blocks))
-
-                chip_blocks = set()
             else:
                 # choose the block with the largest connection to blocks on this chip
                 block_idx = -1
-                max_conn = 0
-                for i in chip_blocks:
-                    for j in unallocated_blocks.intersection(block_conns_out[i]):
-                        ij = block_conns_out[i][j]
-                        if ij > max_conn:
-                            max_conn = ij
-                            block_idx = j
-
-                    for j in unallocated_blocks.intersection(block_conns_in[i]):
-                        ij = block_conns_in[i][j]
-                        if ij > max_conn:
-                            max_conn = ij
-                            block_idx = j
+                while chip_heap:
+                    neg_conn, j = heapq.heappop(chip_heap)
+                    if j in unallocated_blocks and chip_conns[j] == -neg_conn:
+                        block_idx = j
+                        break
 
                 if block_idx < 0:
                     # none of the remaining blocks connect to blocks on this chip,
                     # so pick a no-pre block if possible, otherwise any block will do.
-                    for block_idx in no_pre_blocks:
-                        if block_idx in unallocated_blocks:
-                            break
-                    else:
+                    block_idx = next(iter(no_pre_blocks), None)
+                    if block_idx is None:
                         block_idx = next(iter(unallocated_blocks))
 
             block = block_map[block_idx]
             self.block_to_new_core(block, chip)
 
-            chip_blocks.add(block_idx)
-            unallocated_blocks.remove(block_idx)
+            del unallocated_blocks[block_idx]
+            no_pre_blocks.pop(block_idx, None)
+            for j, ij in block_conns[block_idx].items():
+                if j in unallocated_blocks and ij > chip_conns.get(j, 0):
+                    chip_conns[j] = ij
+                    heapq.heappush(chip_heap, (-ij, j))
 
         # add probes
         board.probes.extend(model.probes)
@@ -27,6 +27,9 @@ class Board:
         # When not using snips, this maps to an NxSDK probe
         self.probe_map = {}
 
+        # cached result of `index_blocks`, cleared when chips, cores or blocks change
+        self._block_index = None
+
     @property
     def n_chips(self):
         return len(self.chips)
@@ -43,6 +46,10 @@ class Board:
         assert chip not in self.chips
         self.chip_idxs[chip] = len(self.chips)
         self.chips.append(chip)
+        self._invalidate_block_index()
+
+    def _invalidate_block_index(self):
+        self._block_index = None
 
     def add_input(self, input):
         self.inputs.append(input)
@@ -85,6 +92,39 @@ class Board:
     def find_synapse(self, synapse):
         return self.synapse_index[synapse]
 
+    def index_blocks(self):
+        """Assign a unique int (block ID) to each block on the board.
+
+        The result is cached until a chip, core, or block is added to the board.
+
+        Returns
+        -------
+        block_map : dict
+            Mapping from block ID to a block, in chip and core order.
+        block_chip : (n_blocks,) ndarray
+            Index of the chip for each block ID.
+        synapse_block_map : dict
+            Mapping from ``id(synapse)`` to the ID of the block containing it.
+        """
+        if self._block_index is None:
+            block_map = {}
+            block_chip = []
+            synapse_block_map = {}
+            for chip in self.chips:
+                chip_idx = self.chip_idxs[chip]
+                for core in chip.cores:
+                    for block in core.blocks:
+                        for synapse in block.synapses:
+                            assert id(synapse) not in synapse_block_map
+                            synapse_block_map[id(synapse)] = len(block_map)
+                        block_map[len(block_map)] = block
+                        block_chip.append(chip_idx)
+
+            block_chip = np.array(block_chip, dtype=int)
+            self._block_index = (block_map, block_chip, synapse_block_map)
+
+        return self._block_index
+
 
 class Chip:
     """A Loihi Chip on a Board, with multiple Cores."""
@@ -103,6 +143,7 @@ class Chip:
         assert core not in self.cores
         self.core_idxs[core] = len(self.cores)
         self.cores.append(core)
+        self.board._invalidate_block_index()
 
     def new_core(self):
         core = Core(chip=self)
@@ -168,6 +209,7 @@ class Core:
 
     def add_block(self, block):
         self.blocks.append(block)
+        self.board._invalidate_block_index()
 
     def add_compartment_cfg(self, compartment_cfg):
         self.compartment_cfgs.append(compartment_cfg)
@@ -366,7 +408,7 @@ class CompartmentConfig(Config):
     DECAY_V_MAX = 4095
     REFRACT_DELAY_MAX = 63
 
-    params = ("decay_u", "decay_v", "refract_delay", "enable_noise")
+    params = __slots__ = ("decay_u", "decay_v", "refract_delay", "enable_noise")
 
     def __init__(self, decay_v, decay_u, refract_delay, enable_noise):
         super().__init__()
@@ -386,7 +428,7 @@ class VthConfig(Config):
         actual voltage threshold, this is multiplied by VTH_EXP.
     """
 
-    params = ("vth",)
+    params = __slots__ = ("vth",)
 
     def __init__(self, vth):
         super().__init__()
@@ -394,7 +436,7 @@ class VthConfig(Config):
 
 
 class TraceConfig(Config):
-    params = ("tau", "spike_int", "spike_frac")
+    params = __slots__ = ("tau", "spike_int", "spike_frac")
 
     def __init__(self, tau=0, spike_int=0, spike_frac=0):
         super().__init__()
@@ -13,7 +13,9 @@ from nengo_loihi.hardware.allocators import (
     GreedyInterchip,
     PartitionInterchip,
     RoundRobin,
+    core_compartment_cfgs,
     core_stdp_pre_cfgs,
+    core_vth_cfgs,
     ensemble_to_block_rates,
     estimate_interchip_activity,
 )
@@ -50,6 +52,54 @@ def test_core_stdp_pre_cfgs():
     assert ret_idxs == profile_idxs
 
 
+def test_core_compartment_cfgs():
+    core = Board().new_chip().new_core()
+
+    block0 = LoihiBlock(4)
+    block0.compartment.decay_u[:] = [1, 2, 1, 2]
+    block0.compartment.refract_delay[:] = [1, 1, 1, 3]
+    core.add_block(block0)
+
+    block1 = LoihiBlock(3)
+    block1.compartment.decay_u[:] = [2, 1, 5]
+    block1.compartment.refract_delay[:] = [1, 1, 1]
+    core.add_block(block1)
+
+    # all compartments the same, matching some compartments in other blocks
+    block2 = LoihiBlock(5)
+    block2.compartment.refract_delay[:] = 1
+    core.add_block(block2)
+
+    cfgs, cfg_idxs = core_compartment_cfgs(core)
+    assert len(cfgs) == 4
+    idxs0, idxs1, idxs2 = cfg_idxs[block0], cfg_idxs[block1], cfg_idxs[block2]
+    assert idxs0[0] == idxs0[2] == idxs1[1]
+    assert idxs0[1] == idxs1[0]
+    assert np.all(idxs2 == idxs0[0])
+    assert len(set(idxs0) | set(idxs1)) == 4
+    for block in (block0, block1, block2):
+        for i, idx in enumerate(cfg_idxs[block]):
+            assert cfgs[idx].decay_u == block.compartment.decay_u[i]
+            assert cfgs[idx].refract_delay == block.compartment.refract_delay[i]
+
+
+def test_core_vth_cfgs():
+    core = Board().new_chip().new_core()
+
+    block0 = LoihiBlock(1024)
+    block0.compartment.vth[:] = 64 * 5
+    core.add_block(block0)
+
+    block1 = LoihiBlock(3)
+    block1.compartment.vth[:] = [64 * 7, 64 * 5, 64 * 7]
+    core.add_block(block1)
+
+    cfgs, cfg_idxs = core_vth_cfgs(core)
+    assert [cfg.vth for cfg in cfgs] == [5, 7]
+    assert np.array_equal(cfg_idxs[block0], np.zeros(1024))
+    assert np.array_equal(cfg_idxs[block1], [1, 0, 1])
+
+
 def test_big_block_error():
     model = Model()
     model.add_block(LoihiBlock(1050))
@@ -172,6 +222,26 @@ def test_greedy_chip_allocator_cfg_check():
         Greedy(cores_per_chip=130)(model, n_chips=4)
 
 
+def test_board_index_blocks():
+    model = _basic_model(n_blocks=3)
+    board = Greedy(cores_per_chip=2)(model, n_chips=2)
+
+    block_map, block_chip, synapse_block_map = board.index_blocks()
+    assert list(block_map.values()) == list(model.blocks)
+    assert np.array_equal(block_chip, [0, 0, 1])
+    for i, block in block_map.items():
+        for synapse in block.synapses:
+            assert synapse_block_map[id(synapse)] == i
+
+    # result is cached until the board changes
+    assert board.index_blocks() is board.index_blocks()
+    index = board.index_blocks()
+    new_block = next(iter(_basic_model(n_blocks=1).blocks))
+    Greedy().block_to_new_core(new_block, board.chips[1])
+    assert board.index_blocks() is not index
+    assert len(board.index_blocks()[0]) == 4
+
+
 @pytest.mark.parametrize("Allocator", [GreedyInterchip, PartitionInterchip])
 def test_interchip_allocators(Allocator, Simulator):
     if Allocator is PartitionInterchip:
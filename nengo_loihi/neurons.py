@@ -1,3 +1,4 @@
+import functools
 import logging
 
 import numpy as np
@@ -87,15 +88,31 @@ def discretize_tau_ref(tau_ref, dt):
     return dt * lib.round(tau_ref / dt)
 
 
+@functools.lru_cache(maxsize=None)
+def _discretize_lif_taus(tau_rc, tau_ref, dt):
+    """Cached (NumPy-only) discretization of LIF time constants."""
+    return discretize_tau_rc(tau_rc, dt), discretize_tau_ref(tau_ref, dt)
+
+
 def loihi_lif_rates(neuron_type, x, gain, bias, dt, amplitude=None):
-    tau_ref = discretize_tau_ref(neuron_type.tau_ref, dt)
-    tau_rc = discretize_tau_rc(neuron_type.tau_rc, dt)
+    tau_rc, tau_ref = _discretize_lif_taus(
+        float(neuron_type.tau_rc), float(neuron_type.tau_ref), float(dt)
+    )
     amplitude = neuron_type.amplitude if amplitude is None else amplitude
 
     j = neuron_type.current(x, gain, bias) - 1
-    out = np.zeros_like(j)
-    period = tau_ref + tau_rc * np.log1p(1.0 / j[j > 0])
-    out[j > 0] = (amplitude / dt) / np.ceil(period / dt)
+    active = j > 0
+
+    # compute on all elements (with a safe value where inactive), reusing one buffer
+    out = np.where(active, j, 1.0)
+    np.divide(1.0, out, out=out)
+    np.log1p(out, out=out)
+    out *= tau_rc
+    out += tau_ref
+    out /= dt
+    np.ceil(out, out=out)
+    np.divide(amplitude / dt, out, out=out)
+    np.putmask(out, ~active, 0)
     return out
 
 
@@ -103,9 +120,15 @@ def loihi_spikingrectifiedlinear_rates(neuron_type, x, gain, bias, dt, amplitude
     amplitude = neuron_type.amplitude if amplitude is None else amplitude
 
     j = neuron_type.current(x, gain, bias)
-    out = np.zeros_like(j)
-    period = 1.0 / j[j > 0]
-    out[j > 0] = (amplitude / dt) / np.ceil(period / dt)
+    active = j > 0
+
+    # compute on all elements (with a safe value where inactive), reusing one buffer
+    out = np.where(active, j, 1.0)
+    np.divide(1.0, out, out=out)
+    out /= dt
+    np.ceil(out, out=out)
+    np.divide(amplitude / dt, out, out=out)
+    np.putmask(out, ~active, 0)
     return out
 
 
@@ -124,19 +147,29 @@ def loihi_regularspiking_rates(neuron_type, x, gain, bias, dt):
 
 
 def _broadcast_rates_inputs(x, gain, bias):
-    x = np.array(x, dtype=float, copy=False, ndmin=1)
-    gain = np.array(gain, dtype=float, copy=False, ndmin=1)
-    bias = np.array(bias, dtype=float, copy=False, ndmin=1)
+    x = np.atleast_1d(np.asarray(x, dtype=float))
+    gain = np.atleast_1d(np.asarray(gain, dtype=float))
+    bias = np.atleast_1d(np.asarray(bias, dtype=float))
     if x.ndim == 1:
-        x = x[:, np.newaxis] * np.ones(gain.shape[-1])
+        # read-only view, so we don't allocate the full (x.size, n_neurons) array
+        x = np.broadcast_to(x[:, np.newaxis], (x.shape[0], gain.shape[-1]))
     return x, gain, bias
 
 
+@functools.lru_cache(maxsize=None)
+def _loihi_rate_function(neuron_cls):
+    """Find the function in ``loihi_rate_functions`` for a neuron type (if any)."""
+    for cls in neuron_cls.__mro__:
+        if cls in loihi_rate_functions:
+            return loihi_rate_functions[cls]
+    return None
+
+
 def loihi_rates(neuron_type, x, gain, bias, dt):
     x, gain, bias = _broadcast_rates_inputs(x, gain, bias)
-    for cls in type(neuron_type).__mro__:
-        if cls in loihi_rate_functions:
-            return loihi_rate_functions[cls](neuron_type, x, gain, bias, dt)
+    rate_function = _loihi_rate_function(type(neuron_type))
+    if rate_function is not None:
+        return rate_function(neuron_type, x, gain, bias, dt)
     return neuron_type.rates(x, gain, bias)
 
 
@@ -204,19 +237,25 @@ class LoihiLIF(LIF):
         return loihi_lif_rates(self, x, gain, bias, dt)
 
     def step(self, dt, J, output, voltage, refractory_time):
-        tau_ref = discretize_tau_ref(self.tau_ref, dt)
-        tau_rc = discretize_tau_rc(self.tau_rc, dt)
+        tau_rc, tau_ref = _discretize_lif_taus(
+            float(self.tau_rc), float(self.tau_ref), float(dt)
+        )
 
+        # operate in-place where possible, to avoid allocating temporaries
         refractory_time -= dt
-        delta_t = (dt - refractory_time).clip(0, dt)
-        voltage -= (J - voltage) * np.expm1(-delta_t / tau_rc)
+        decay = np.clip(dt - refractory_time, 0, dt)
+        decay /= -tau_rc
+        np.expm1(decay, out=decay)
+        dv = J - voltage
+        dv *= decay
+        voltage -= dv
 
         spikes_mask = voltage > 1
-        output[:] = spikes_mask * (self.amplitude / dt)
+        np.multiply(spikes_mask, self.amplitude / dt, out=output)
 
-        voltage[voltage < self.min_voltage] = self.min_voltage
-        voltage[spikes_mask] = 0
-        refractory_time[spikes_mask] = tau_ref + dt
+        np.maximum(voltage, self.min_voltage, out=voltage)
+        np.putmask(voltage, spikes_mask, 0)
+        np.putmask(refractory_time, spikes_mask, tau_ref + dt)
 
 
 class LoihiSpikingRectifiedLinear(SpikingRectifiedLinear):
@@ -240,10 +279,11 @@ class LoihiSpikingRectifiedLinear(SpikingRectifiedLinear):
         return loihi_spikingrectifiedlinear_rates(self, x, gain, bias, dt)
 
     def step(self, dt, J, output, voltage):
+        # operate in-place where possible, to avoid allocating temporaries
         voltage += J * dt
 
         spikes_mask = voltage > 1
-        output[:] = spikes_mask * (self.amplitude / dt)
+        np.multiply(spikes_mask, self.amplitude / dt, out=output)
 
-        voltage[voltage < 0] = 0
-        voltage[spikes_mask] = 0
+        np.maximum(voltage, 0, out=voltage)
+        np.putmask(voltage, spikes_mask, 0)